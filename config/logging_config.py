@@ -1,5 +1,8 @@
+import atexit
 import logging
+import queue
 import sys
+from logging.handlers import QueueHandler, QueueListener
 from pathlib import Path
 
 def setup_logging():
@@ -8,6 +11,8 @@ def setup_logging():
 
     - Creates a 'logs' directory if it does not exist.
     - Logs messages to both a file ('logs/automation.log') and the console (stdout).
+    - Writes records from a background QueueListener thread, so logging calls in the
+      scraping and database loops only enqueue the record. The log file is opened lazily.
     - Sets the log format to include timestamp, log level, logger name, and message.
     - Sets the logging level to INFO for the root logger.
     - Sets WARNING level for noisy third-party libraries (selenium, urllib3, WDM).
@@ -16,13 +21,25 @@ def setup_logging():
     log_directory.mkdir(exist_ok=True)
     log_file = log_directory / "automation.log"
 
+    formatter = logging.Formatter("%(asctime)s [%(levelname)s] [%(name)s] - %(message)s")
+    file_handler = logging.FileHandler(log_file, delay=True)
+    file_handler.setFormatter(formatter)
+    stream_handler = logging.StreamHandler(sys.stdout)
+    stream_handler.setFormatter(formatter)
+
+    # The actual handlers run on the listener thread; the root logger only enqueues records
+    log_queue = queue.Queue(-1)
+    listener = QueueListener(log_queue, file_handler, stream_handler, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
+
+    # Only merge the message (and any traceback) here; the listener's handlers apply the format
+    queue_handler = QueueHandler(log_queue)
+    queue_handler.setFormatter(logging.Formatter("%(message)s"))
+
     logging.basicConfig(
         level=logging.INFO,
-        format="%(asctime)s [%(levelname)s] [%(name)s] - %(message)s",
-        handlers=[
-            logging.FileHandler(log_file),
-            logging.StreamHandler(sys.stdout)
-        ]
+        handlers=[queue_handler]
     )
 
     # Reduce verbosity of third-party libraries
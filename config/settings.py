@@ -1,25 +1,17 @@
+import functools
+import logging
 import os
 from pathlib import Path
 from dotenv import load_dotenv
 
-# -----------------------------------------------------------------------------
-# Load environment variables from .env file
-# -----------------------------------------------------------------------------
-load_dotenv()
-
-# -----------------------------------------------------------------------------
-# Database Configuration
-# -----------------------------------------------------------------------------
-DB_HOST = os.getenv("DB_HOST")
-DB_PORT = os.getenv("DB_PORT")
-DB_NAME = os.getenv("DB_NAME")
-DB_USER = os.getenv("DB_USER")
-DB_PASSWORD = os.getenv("DB_PASSWORD")
+logger = logging.getLogger(__name__)
 
 # -----------------------------------------------------------------------------
 # OFAC Configuration
 # -----------------------------------------------------------------------------
 OFAC_URL = "https://sanctionssearch.ofac.treas.gov/"
+OFAC_WAIT_TIMEOUT = 20  # Seconds to wait for OFAC page elements and results
+OFAC_POLL_FREQUENCY = 0.1  # Seconds between checks while waiting
 
 # -----------------------------------------------------------------------------
 # Database Table Names
@@ -28,16 +20,17 @@ PERSONS_TABLE = '"Personas"'
 MASTER_DETAIL_TABLE = '"MaestraDetallePersonas"'
 RESULTS_TABLE = '"Resultadosuser9886"'
 
+# -----------------------------------------------------------------------------
+# Database Connection Pool
+# -----------------------------------------------------------------------------
+DB_POOL_MIN_CONNECTIONS = 2
+DB_POOL_MAX_CONNECTIONS = 8
+
 # -----------------------------------------------------------------------------
 # Directory Paths
 # -----------------------------------------------------------------------------
 BASE_DIR = Path(__file__).resolve().parent.parent
-SCREENSHOTS_DIR = BASE_DIR / "screenshots"
-REPORTS_DIR = BASE_DIR / "reports"
-
-# Ensure required directories exist
-SCREENSHOTS_DIR.mkdir(exist_ok=True)
-REPORTS_DIR.mkdir(exist_ok=True)
+CHROMEDRIVER_PATH_CACHE = Path.home() / ".cache" / "ofac_automation" / "chromedriver_path"
 
 # -----------------------------------------------------------------------------
 # Process Constants
@@ -47,6 +40,63 @@ STATUS_OK = "OK"
 STATUS_ERROR = "NOK"
 STATUS_INCOMPLETE = "Información incompleta"
 STATUS_NO_MASTER_RECORD = "No cruza con maestra"
+RESULTS_BATCH_SIZE = 100  # OFAC results buffered in memory before each database flush
+COPY_THRESHOLD = 50  # Buffered results at or above this size are flushed with COPY instead of INSERT
+FETCH_ITERSIZE = 2000  # Rows pulled per round-trip when streaming persons to process
+
+# -----------------------------------------------------------------------------
+# Lazily initialized settings (environment variables and directories)
+# -----------------------------------------------------------------------------
+def _workers_from_env(default: int = 4) -> int:
+    """
+    Reads OFAC_WORKERS, falling back to `default` if it is not a whole number.
+    A bad value in this tuning knob must not break the other lazily initialized settings.
+    """
+    value = os.getenv("OFAC_WORKERS", str(default))
+    try:
+        return max(1, int(value))
+    except ValueError:
+        logger.warning(f"Invalid OFAC_WORKERS value '{value}'. Falling back to {default} workers.")
+        return default
+
+@functools.cache
+def _init() -> dict:
+    """
+    Loads the .env file and creates the output directories, exactly once per process.
+
+    Returns:
+        dict: Settings that depend on the environment or on the filesystem.
+    """
+    load_dotenv()
+
+    screenshots_dir = BASE_DIR / "screenshots"
+    reports_dir = BASE_DIR / "reports"
+    screenshots_dir.mkdir(exist_ok=True)
+    reports_dir.mkdir(exist_ok=True)
+
+    return {
+        # Database Configuration
+        "DB_HOST": os.getenv("DB_HOST"),
+        "DB_PORT": os.getenv("DB_PORT"),
+        "DB_NAME": os.getenv("DB_NAME"),
+        "DB_USER": os.getenv("DB_USER"),
+        "DB_PASSWORD": os.getenv("DB_PASSWORD"),
+        # OFAC Configuration
+        "OFAC_BACKEND": os.getenv("OFAC_BACKEND", "selenium"),  # "selenium" (browser) or "http" (direct form POST)
+        "OFAC_WORKERS": _workers_from_env(),  # Searches running in parallel (at least 1)
+        # Directory Paths
+        "SCREENSHOTS_DIR": screenshots_dir,
+        "REPORTS_DIR": reports_dir,
+    }
+
+def __getattr__(name: str):
+    """
+    Resolves lazily initialized settings on first access (PEP 562).
+    """
+    try:
+        return _init()[name]
+    except KeyError:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}") from None
 
 """
 Settings Module Documentation
@@ -55,13 +105,17 @@ Settings Module Documentation
 This module centralizes configuration for the OFAC application.
 
 Sections:
-- Environment Variables: Loaded from a .env file for sensitive data.
-- Database Configuration: Connection parameters for the main database.
-- OFAC Configuration: URL for the OFAC sanctions search.
+- OFAC Configuration: URL and wait timings for the OFAC sanctions search.
 - Table Names: Centralized table names for database operations.
-- Directory Paths: Paths for storing screenshots and reports, created if missing.
+- Database Connection Pool: Size limits for the pool shared by all database operations.
+- Directory Paths: Paths for storing screenshots and reports, created if missing,
+  and the file caching the ChromeDriver location between runs.
 - Process Constants: Standardized status and flag values for process control.
+- Lazily initialized settings: Database configuration, the OFAC search backend
+  and the number of OFAC search workers loaded from a .env file, and the
+  screenshots/reports directories. The .env file is parsed and the directories
+  are created only when one of these values is first accessed.
 
 Usage:
 Import this module wherever configuration values are needed.
-"""
\ No newline at end of file
+"""
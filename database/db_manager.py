@@ -1,130 +1,285 @@
+import io
 import logging
+import threading
+import weakref
+from collections import Counter
+from contextlib import contextmanager
+from typing import Iterator
 import psycopg2
-from psycopg2.extras import execute_values
+from psycopg2.extras import NamedTupleCursor, execute_values
+from psycopg2.pool import ThreadedConnectionPool
 from config import settings
 
 logger = logging.getLogger(__name__)
 
+# Escapes for the PostgreSQL COPY text format
+_COPY_ESCAPES = str.maketrans({"\\": "\\\\", "\t": "\\t", "\n": "\\n", "\r": "\\r"})
+
+def _copy_value(value) -> str:
+    """
+    Serializes a single value for the PostgreSQL COPY text format.
+    """
+    if value is None:
+        return "\\N"
+    return str(value).translate(_COPY_ESCAPES)
+
 class DatabaseManager:
     """
     Handles all database connections and operations for the OFAC application.
 
     Responsibilities:
-    - Establish and close database connections.
-    - Fetch persons to process.
-    - Insert OFAC search results (bulk and single).
+    - Maintain a thread-safe pool of database connections.
+    - Record pre-check failures and fetch persons to process.
+    - Insert OFAC search results (buffered, with a per-row fallback).
     - Fetch incomplete records for reporting.
     """
 
     def __init__(self):
         """
-        Initializes the database connection using settings from the config module.
+        Initializes the database connection pool using settings from the config module.
         Raises:
-            psycopg2.OperationalError: If the connection cannot be established.
+            psycopg2.OperationalError: If the connections cannot be established.
         """
-        self.conn = None
-        self.cursor = None
+        self.pool = None
+        self._prepared_connections = weakref.WeakSet()
+        self._pending_results = []
+        self._pending_lock = threading.Lock()
         try:
-            self.conn = psycopg2.connect(
+            self.pool = ThreadedConnectionPool(
+                minconn=settings.DB_POOL_MIN_CONNECTIONS,
+                maxconn=settings.DB_POOL_MAX_CONNECTIONS,
                 host=settings.DB_HOST,
                 port=settings.DB_PORT,
                 dbname=settings.DB_NAME,
                 user=settings.DB_USER,
                 password=settings.DB_PASSWORD
             )
-            self.cursor = self.conn.cursor()
-            logger.info("Database connection established successfully.")
+            logger.info("Database connection pool established successfully.")
         except psycopg2.OperationalError as e:
             logger.error(f"Could not connect to the database: {e}")
             raise
 
-    def fetch_persons_to_process(self) -> list:
+    @contextmanager
+    def _connection(self):
+        """
+        Borrows a connection from the pool for the duration of the block.
+        Any transaction left open (uncommitted or failed) is rolled back before
+        the connection goes back to the pool.
+        """
+        conn = self.pool.getconn()
+        try:
+            yield conn
+        finally:
+            if not conn.closed:
+                conn.rollback()
+            self.pool.putconn(conn)
+
+    def _prepare_result_row_insert(self, conn, cursor):
         """
-        Fetches all persons marked for processing, joining with master details.
+        Prepares the per-row result INSERT statement once per pooled connection.
+        Connections are tracked weakly, so a connection the pool discards (and any
+        replacement that reuses its backend PID) is prepared again from scratch.
+        """
+        if conn in self._prepared_connections:
+            return
+        cursor.execute(f"""
+            PREPARE insert_result_row AS
+            INSERT INTO {settings.RESULTS_TABLE}
+                ("idPersona", "nombrePersona", "pais", "cantidadDeResultados", "estadoTransaccion")
+            VALUES ($1, $2, $3, $4, $5);
+        """)
+        self._prepared_connections.add(conn)
+
+    def insert_pre_check_failures(self) -> int:
+        """
+        Records every person that fails the pre-checks, entirely server-side.
+
+        Persons marked for processing that have no master record, or whose master
+        record lacks an address or country, are copied into the results table with
+        the matching status in a single INSERT ... SELECT statement.
 
         Returns:
-            list: List of dictionaries with person and master detail data.
+            int: Number of pre-check failures inserted.
+        """
+        query = f"""
+            INSERT INTO {settings.RESULTS_TABLE}
+                ("idPersona", "nombrePersona", "pais", "cantidadDeResultados", "estadoTransaccion")
+            SELECT
+                p."idPersona",
+                p."nombrePersona",
+                m."pais",
+                NULL,
+                CASE WHEN m."idPersona" IS NULL THEN %s ELSE %s END
+            FROM
+                {settings.PERSONS_TABLE} p
+            LEFT JOIN
+                {settings.MASTER_DETAIL_TABLE} m ON p."idPersona" = m."idPersona"
+            WHERE
+                p."aConsultar" = %s
+                AND (
+                    m."idPersona" IS NULL
+                    OR COALESCE(m."direccion", '') = ''
+                    OR COALESCE(m."pais", '') = ''
+                )
+            RETURNING "estadoTransaccion";
+        """
+        params = (settings.STATUS_NO_MASTER_RECORD, settings.STATUS_INCOMPLETE, settings.PROCESS_FLAG)
+        try:
+            with self._connection() as conn, conn.cursor() as cursor:
+                cursor.execute(query, params)
+                statuses = Counter(row[0] for row in cursor.fetchall())
+                conn.commit()
+            logger.info(
+                f"Pre-checks complete: {statuses[settings.STATUS_INCOMPLETE]} incomplete, "
+                f"{statuses[settings.STATUS_NO_MASTER_RECORD]} without master record."
+            )
+            return sum(statuses.values())
+        except Exception as e:
+            logger.error(f"Failed to insert pre-check failures: {e}")
+            return 0
+
+    def fetch_persons_to_process(self) -> Iterator[tuple]:
+        """
+        Streams the persons marked for processing that passed the pre-checks,
+        i.e. with a master record that has both an address and a country.
+
+        Rows are read through a server-side cursor in chunks of settings.FETCH_ITERSIZE,
+        so the full result set is never held in memory. The stream keeps its own pooled
+        connection until it is exhausted, so results can be flushed while it is consumed.
+
+        Yields:
+            namedtuple: Person and master detail data, one attribute per column.
         """
         query = f"""
             SELECT
                 p."idPersona",
                 p."nombrePersona",
-                m."idPersona" as "idMaestra",
                 m."direccion",
                 m."pais"
             FROM
                 {settings.PERSONS_TABLE} p
-            LEFT JOIN
+            JOIN
                 {settings.MASTER_DETAIL_TABLE} m ON p."idPersona" = m."idPersona"
             WHERE
-                p."aConsultar" = %s;
+                p."aConsultar" = %s
+                AND COALESCE(m."direccion", '') <> ''
+                AND COALESCE(m."pais", '') <> '';
         """
         try:
-            self.cursor.execute(query, (settings.PROCESS_FLAG,))
-            columns = [column_description[0] for column_description in self.cursor.description]
-            return [dict(zip(columns, row)) for row in self.cursor.fetchall()]
+            with self._connection() as conn, conn.cursor(name="persons_stream", cursor_factory=NamedTupleCursor) as stream_cursor:
+                stream_cursor.itersize = settings.FETCH_ITERSIZE
+                stream_cursor.execute(query, (settings.PROCESS_FLAG,))
+                yield from stream_cursor
         except Exception as e:
             logger.error(f"Failed to fetch persons to process: {e}")
-            return []
 
-    def insert_results_bulk(self, results_data: list):
+    def _insert_result_row(self, row: tuple) -> bool:
         """
-        Inserts multiple OFAC search result records in a single transaction.
+        Inserts and commits one result row through a prepared statement, so the server
+        parses and plans the INSERT only once per connection. Logs the failure if the
+        row cannot be written.
 
         Args:
-            results_data (list): List of tuples with result data.
-        """
-        if not results_data:
-            return
+            row (tuple): Result data in results table column order.
 
-        query = f"""
-            INSERT INTO {settings.RESULTS_TABLE}
-                ("idPersona", "nombrePersona", "pais", "cantidadDeResultados", "estadoTransaccion")
-            VALUES %s;
+        Returns:
+            bool: True if the row was committed.
         """
+        query = "EXECUTE insert_result_row (%s, %s, %s, %s, %s);"
         try:
-            execute_values(self.cursor, query, results_data)
-            self.conn.commit()
-            logger.info(f"Successfully bulk-inserted {len(results_data)} records.")
+            with self._connection() as conn, conn.cursor() as cursor:
+                self._prepare_result_row_insert(conn, cursor)
+                cursor.execute(query, row)
+                conn.commit()
+            return True
         except Exception as e:
-            logger.error(f"Failed to bulk-insert results: {e}")
-            self.conn.rollback()
+            logger.error(f"Failed to insert result for person ID {row[0]}: {e}")
+            return False
 
-    def insert_single_result(self, person_data: dict, result_count: int, status: str):
+    def queue_result(self, person_data: tuple, result_count: int, status: str):
         """
-        Inserts a single OFAC search result record.
+        Buffers a single OFAC search result record until the next flush_results call.
+        Safe to call from several threads.
 
         Args:
-            person_data (dict): Person data dictionary.
+            person_data (namedtuple): Person data row.
             result_count (int): Number of OFAC results.
             status (str): Transaction status.
         """
+        with self._pending_lock:
+            self._pending_results.append((
+                person_data.idPersona,
+                person_data.nombrePersona,
+                person_data.pais,
+                result_count,
+                status
+            ))
+
+    def flush_results(self, page_size: int = settings.RESULTS_BATCH_SIZE):
+        """
+        Inserts all buffered OFAC search result records in a single transaction.
+        Buffers of settings.COPY_THRESHOLD rows or more are sent with COPY FROM STDIN.
+        If the batch fails, its rows are retried one by one, so only the offending
+        rows are lost (each one is logged).
+
+        Args:
+            page_size (int): Maximum number of rows sent per INSERT statement.
+        """
+        with self._pending_lock:
+            if not self._pending_results:
+                return
+
+            query = f"""
+                INSERT INTO {settings.RESULTS_TABLE}
+                    ("idPersona", "nombrePersona", "pais", "cantidadDeResultados", "estadoTransaccion")
+                VALUES %s;
+            """
+            try:
+                # One transaction, and so one commit, per flushed batch
+                with self._connection() as conn, conn.cursor() as cursor:
+                    if len(self._pending_results) >= settings.COPY_THRESHOLD:
+                        self._copy_flush(cursor, self._pending_results)
+                    else:
+                        execute_values(cursor, query, self._pending_results, page_size=page_size)
+                    conn.commit()
+                logger.info(f"Flushed {len(self._pending_results)} buffered results.")
+            except Exception as e:
+                logger.error(
+                    f"Failed to flush {len(self._pending_results)} buffered results, "
+                    f"retrying them one by one: {e}"
+                )
+                inserted = sum(self._insert_result_row(row) for row in self._pending_results)
+                logger.info(f"Inserted {inserted} of {len(self._pending_results)} buffered results individually.")
+            self._pending_results.clear()
+
+    def _copy_flush(self, cursor, rows: list):
+        """
+        Streams result rows into the results table with COPY FROM STDIN.
+        Does not commit; the caller owns the transaction.
+
+        Args:
+            cursor: Cursor of the connection owning the transaction.
+            rows (list): List of tuples with result data.
+        """
+        buffer = io.StringIO()
+        for row in rows:
+            buffer.write("\t".join(_copy_value(value) for value in row))
+            buffer.write("\n")
+        buffer.seek(0)
+
         query = f"""
-            INSERT INTO {settings.RESULTS_TABLE}
+            COPY {settings.RESULTS_TABLE}
                 ("idPersona", "nombrePersona", "pais", "cantidadDeResultados", "estadoTransaccion")
-            VALUES (%s, %s, %s, %s, %s);
+            FROM STDIN WITH (FORMAT text, NULL '\\N')
         """
-        try:
-            params = (
-                person_data['idPersona'],
-                person_data['nombrePersona'],
-                person_data['pais'],
-                result_count,
-                status
-            )
-            self.cursor.execute(query, params)
-            self.conn.commit()
-            logger.info(f"Inserted result for person ID {person_data['idPersona']} with status '{status}'.")
-        except Exception as e:
-            logger.error(f"Failed to insert single result for person ID {person_data['idPersona']}: {e}")
-            self.conn.rollback()
+        cursor.copy_expert(query, buffer)
 
     def fetch_incomplete_records_for_report(self) -> list:
         """
         Fetches all records from the results table marked as 'Información incompleta'.
 
         Returns:
-            list: List of dictionaries with incomplete record data.
+            list: List of namedtuples with incomplete record data.
         """
         query = f"""
             SELECT
@@ -138,9 +293,9 @@ class DatabaseManager:
                 "estadoTransaccion" = %s;
         """
         try:
-            self.cursor.execute(query, (settings.STATUS_INCOMPLETE,))
-            columns = [column_description[0] for column_description in self.cursor.description]
-            records = [dict(zip(columns, row)) for row in self.cursor.fetchall()]
+            with self._connection() as conn, conn.cursor(cursor_factory=NamedTupleCursor) as cursor:
+                cursor.execute(query, (settings.STATUS_INCOMPLETE,))
+                records = cursor.fetchall()
             logger.info(f"Fetched {len(records)} incomplete records for Excel report.")
             return records
         except Exception as e:
@@ -149,10 +304,8 @@ class DatabaseManager:
 
     def disconnect(self):
         """
-        Closes the database connection and cursor.
+        Closes all pooled database connections.
         """
-        if self.cursor:
-            self.cursor.close()
-        if self.conn:
-            self.conn.close()
-            logger.info("Database connection closed.")
\ No newline at end of file
+        if self.pool and not self.pool.closed:
+            self.pool.closeall()
+            logger.info("Database connection pool closed.")
\ No newline at end of file
@@ -1,108 +1,130 @@
 import logging
+import queue
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from contextlib import closing
+from itertools import chain
+from typing import Iterable
 from config import settings, logging_config
 from database.db_manager import DatabaseManager
 from scraping.ofac_scraper import OfacScraper
+from scraping.ofac_http_client import OfacHttpClient
 from reporting.excel_exporter import create_incomplete_records_report
 
 # Setup logging as the first step
 logging_config.setup_logging()
 logger = logging.getLogger(__name__)
 
-def categorize_persons(all_persons: list) -> tuple:
-    """
-    Categorizes persons into three groups:
-    - search_queue: Persons with complete and valid data.
-    - incomplete_records: Persons missing address or country.
-    - no_master_records: Persons missing a master record.
-    Returns a tuple of (search_queue, incomplete_records, no_master_records).
-    """
-    search_queue = []
-    incomplete_records = []
-    no_master_records = []
-
-    for person in all_persons:
-        if person['idMaestra'] is None:
-            no_master_records.append(person)
-        elif not person['direccion'] or not person['pais']:
-            incomplete_records.append(person)
-        else:
-            search_queue.append(person)
-    
-    logger.info(
-        f"Categorization complete: {len(search_queue)} to search, "
-        f"{len(incomplete_records)} incomplete, "
-        f"{len(no_master_records)} without master record."
-    )
-    return search_queue, incomplete_records, no_master_records
-
-def process_pre_checks(db_manager: DatabaseManager, incomplete: list, no_master: list):
+# Search backends selectable through settings.OFAC_BACKEND
+SCRAPER_BACKENDS = {
+    "selenium": OfacScraper,
+    "http": OfacHttpClient
+}
+
+def start_scrapers(count: int) -> list:
     """
-    Handles persons who failed pre-checks (incomplete or missing master record).
-    Inserts their status into the database in bulk.
+    Starts up to `count` OFAC scrapers of the configured backend in parallel.
+    Scrapers that fail to start are logged and skipped.
+    Returns the list of running scrapers.
     """
-    bulk_data = []
-
-    for person in incomplete:
-        record = (
-            person['idPersona'],
-            person['nombrePersona'],
-            person['pais'],
-            None,
-            settings.STATUS_INCOMPLETE
-        )
-        bulk_data.append(record)
-
-    for person in no_master:
-        record = (
-            person['idPersona'],
-            person['nombrePersona'],
-            None,
-            None,
-            settings.STATUS_NO_MASTER_RECORD
-        )
-        bulk_data.append(record)
-    
-    if bulk_data:
-        logger.info(f"Performing bulk insert for {len(bulk_data)} pre-checked records.")
-        db_manager.insert_results_bulk(bulk_data)
-
-def run_ofac_searches(db_manager: DatabaseManager, search_queue: list):
+    scraper_class = SCRAPER_BACKENDS.get(settings.OFAC_BACKEND)
+    if scraper_class is None:
+        logger.error(f"Unknown OFAC backend '{settings.OFAC_BACKEND}'. Expected one of: {', '.join(SCRAPER_BACKENDS)}.")
+        return []
+
+    scrapers = []
+    with ThreadPoolExecutor(max_workers=count) as executor:
+        futures = [executor.submit(scraper_class) for _ in range(count)]
+        for future in futures:
+            try:
+                scrapers.append(future.result())
+            except Exception as e:
+                logger.error(f"Could not start an OFAC scraper: {e}")
+    return scrapers
+
+def search_with_idle_scraper(idle_scrapers: queue.Queue, person: tuple) -> tuple:
     """
-    Runs OFAC searches for all persons in the search queue.
-    Handles result insertion and screenshot capture for positive matches.
+    Runs the OFAC search for one person on the next idle scraper.
+    Screenshots are taken here, since they need the browser session that ran the search.
+    Returns a tuple of (person, result_count).
     """
-    if not search_queue:
-        logger.info("Search queue is empty. No OFAC checks to perform.")
-        return
-
+    scraper = idle_scrapers.get()
     try:
-        scraper = OfacScraper()
-    except Exception as e:
-        logger.error(f"Could not start the OFAC scraper. Aborting search process. Error: {e}")
-        return
+        person_id = person.idPersona
+        logger.info(f"Processing person ID: {person_id}, Name: {person.nombrePersona}")
 
-    for person in search_queue:
-        person_id = person['idPersona']
-        logger.info(f"Processing person ID: {person_id}, Name: {person['nombrePersona']}")
-        
         result_count = scraper.search_person(
-            name=person['nombrePersona'],
-            address=person['direccion'],
-            country=person['pais']
+            name=person.nombrePersona,
+            address=person.direccion,
+            country=person.pais
         )
-        
-        if result_count > -1:
-            status = settings.STATUS_OK
-            db_manager.insert_single_result(person, result_count, status)
-            if result_count > 0:
-                scraper.take_screenshot(person_id)
-        else:
-            status = settings.STATUS_ERROR
-            db_manager.insert_single_result(person, None, status)
+        if result_count > 0:
+            scraper.take_screenshot(person_id)
 
         scraper.reset_search_form()
+    finally:
+        idle_scrapers.put(scraper)
+    return person, result_count
+
+def record_search_results(db_manager: DatabaseManager, done: set):
+    """
+    Queues the results of completed searches for insertion.
+    """
+    for future in done:
+        person, result_count = future.result()
+        if result_count > -1:
+            db_manager.queue_result(person, result_count, settings.STATUS_OK)
+        else:
+            db_manager.queue_result(person, None, settings.STATUS_ERROR)
 
-    scraper.close()
+def run_ofac_searches(db_manager: DatabaseManager, search_queue: Iterable[tuple]) -> int:
+    """
+    Runs OFAC searches for all persons in the search queue, on settings.OFAC_WORKERS
+    scrapers in parallel.
+    Handles result insertion (flushed in batches) and screenshot capture for positive matches.
+    Returns the number of persons processed.
+    """
+    # Peek at the queue so the browsers are only started when there is work to do
+    search_queue = iter(search_queue)
+    first_person = next(search_queue, None)
+    if first_person is None:
+        logger.info("Search queue is empty. No OFAC checks to perform.")
+        return 0
+
+    scrapers = start_scrapers(settings.OFAC_WORKERS)
+    if not scrapers:
+        logger.error("Could not start any OFAC scraper. Aborting search process.")
+        return 0
+    logger.info(f"Running OFAC searches with {len(scrapers)} parallel '{settings.OFAC_BACKEND}' scrapers.")
+
+    idle_scrapers = queue.Queue()
+    for scraper in scrapers:
+        idle_scrapers.put(scraper)
+
+    # Bound the searches in flight so the search queue keeps streaming from the database
+    max_in_flight = 2 * len(scrapers)
+    executor = ThreadPoolExecutor(max_workers=len(scrapers))
+    in_flight = set()
+    processed = 0
+    try:
+        for person in chain([first_person], search_queue):
+            if len(in_flight) >= max_in_flight:
+                done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                record_search_results(db_manager, done)
+                processed_before, processed = processed, processed + len(done)
+                if processed // settings.RESULTS_BATCH_SIZE > processed_before // settings.RESULTS_BATCH_SIZE:
+                    db_manager.flush_results()
+            in_flight.add(executor.submit(search_with_idle_scraper, idle_scrapers, person))
+
+        done, in_flight = wait(in_flight)
+        record_search_results(db_manager, done)
+        processed += len(done)
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+        # Persist whatever is still buffered, even if the loop was interrupted
+        db_manager.flush_results()
+        for scraper in scrapers:
+            scraper.close()
+    return processed
 
 def generate_final_reports(db_manager: DatabaseManager):
     """
@@ -117,8 +139,8 @@ def main():
     """
     Main function to orchestrate the entire OFAC background check automation process.
     Steps:
-    1. Connect to the database and fetch persons to process.
-    2. Categorize persons and handle pre-check failures.
+    1. Connect to the database and record pre-check failures server-side.
+    2. Fetch the persons that passed the pre-checks.
     3. Run OFAC searches for valid records.
     4. Generate final reports.
     """
@@ -126,14 +148,15 @@ def main():
     db_manager = None
     try:
         db_manager = DatabaseManager()
-        all_persons = db_manager.fetch_persons_to_process()
-        if not all_persons:
+        pre_check_failures = db_manager.insert_pre_check_failures()
+        # Close the stream even if the searches stop early, so its pooled
+        # connection is returned before disconnect() closes the pool
+        with closing(db_manager.fetch_persons_to_process()) as search_queue:
+            searched = run_ofac_searches(db_manager, search_queue)
+        if not (pre_check_failures or searched):
             logger.info("No persons found with the 'aConsultar' flag set to 'SI'.")
             return
 
-        search_queue, incomplete, no_master = categorize_persons(all_persons)
-        process_pre_checks(db_manager, incomplete, no_master)
-        run_ofac_searches(db_manager, search_queue)
         generate_final_reports(db_manager)
 
     except Exception as e:
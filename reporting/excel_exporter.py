@@ -1,7 +1,7 @@
 import logging
 from datetime import datetime
 from pathlib import Path
-import pandas as pd
+import xlsxwriter
 from config import settings
 
 logger = logging.getLogger(__name__)
@@ -11,7 +11,7 @@ def create_incomplete_records_report(records: list):
     Generate an Excel report from a list of incomplete records.
 
     Args:
-        records (list): List of dictionaries, each representing a record.
+        records (list): List of namedtuples, each representing a record.
     Returns:
         None
     """
@@ -20,31 +20,32 @@ def create_incomplete_records_report(records: list):
         return
 
     try:
-        # Create DataFrame from records
-        data_frame = pd.DataFrame(records)
-
         # Generate dynamic filename with timestamp
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         file_name = f"Incomplete_Records_Report_{timestamp}.xlsx"
         file_path = Path(settings.REPORTS_DIR) / file_name
 
-        # Select and rename columns for clarity
-        data_frame = data_frame[['idPersona', 'nombrePersona', 'pais', 'estadoTransaccion']]
-        data_frame.columns = ['Person ID', 'Person Name', 'Country', 'Transaction Status']
-
-        # Save DataFrame to Excel
-        data_frame.to_excel(file_path, index=False, engine='openpyxl')
-
-        # Adjust column widths using openpyxl
-        from openpyxl import load_workbook
-        work_book = load_workbook(file_path)
-        work_sheet = work_book.active
-
-        work_sheet.column_dimensions['B'].width = 35  # Person Name
-        work_sheet.column_dimensions['C'].width = 15  # Country
-        work_sheet.column_dimensions['D'].width = 25  # Transaction Status
+        # Stream rows straight to disk; constant_memory flushes each row once written
+        work_book = xlsxwriter.Workbook(str(file_path), {'constant_memory': True})
+        try:
+            work_sheet = work_book.add_worksheet()
+
+            work_sheet.set_column('B:B', 35)  # Person Name
+            work_sheet.set_column('C:C', 15)  # Country
+            work_sheet.set_column('D:D', 25)  # Transaction Status
+
+            # Header row with readable column names, then one row per record
+            work_sheet.write_row(0, 0, ('Person ID', 'Person Name', 'Country', 'Transaction Status'))
+            for row_number, record in enumerate(records, start=1):
+                work_sheet.write_row(row_number, 0, (
+                    record.idPersona,
+                    record.nombrePersona,
+                    record.pais,
+                    record.estadoTransaccion
+                ))
+        finally:
+            work_book.close()
 
-        work_book.save(file_path)
         logger.info(f"Successfully generated Excel report: {file_path}")
 
     except Exception as e:
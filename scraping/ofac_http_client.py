@@ -0,0 +1,150 @@
+import logging
+import os
+from datetime import datetime
+import lxml.html
+import requests
+from requests.adapters import HTTPAdapter
+from config import settings
+from scraping.ofac_scraper import _RESULT_RE
+
+logger = logging.getLogger(__name__)
+
+class OfacHttpClient:
+    """
+    Searches the OFAC sanctions list platform by posting its ASP.NET form directly.
+
+    Drop-in alternative to OfacScraper (same public methods) that needs no browser:
+    each search is a single POST carrying the form state (__VIEWSTATE,
+    __EVENTVALIDATION, ...) harvested from the previous response. Since there is no
+    rendered page, positive matches are saved as the HTML of the results page.
+    """
+
+    def __init__(self):
+        """
+        Opens an HTTP session and loads the search form once.
+        Raises an exception if the search page cannot be loaded.
+        """
+        try:
+            self.session = requests.Session()
+            self.session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=1))
+            self._last_page = None
+            # Results pages are named after the date the client started, resolved once per run
+            self._screenshot_prefix = os.path.join(
+                str(settings.SCREENSHOTS_DIR), datetime.now().strftime('%Y%m%d') + "_"
+            )
+            self._load_search_form()
+            logger.info("OFAC HTTP client initialized successfully.")
+        except Exception as e:
+            logger.error(f"Failed to initialize the OFAC HTTP client: {e}")
+            raise
+
+    def _load_search_form(self):
+        """
+        Fetches the OFAC search page and binds its form state.
+        Only needed on startup or to recover from an unexpected page state.
+        """
+        response = self.session.get(settings.OFAC_URL, timeout=settings.OFAC_WAIT_TIMEOUT)
+        response.raise_for_status()
+        page = lxml.html.fromstring(response.content)
+        self._bind_form_fields(page)
+        self._country_values = {
+            option.text_content().strip(): option.get("value")
+            for option in page.xpath('//select[@id="ctl00_MainContent_ddlCountry"]/option')
+        }
+
+    def _bind_form_fields(self, page):
+        """
+        Caches the form values (hidden ASP.NET state included) and the search button value.
+        Must be called again after every postback, since the form state changes with each response.
+        """
+        form = page.forms[0]
+        # Read both before assigning, so a page without the search form leaves no partial state
+        search_button = form.inputs["ctl00$MainContent$btnSearch"].value
+        self._form_values = dict(form.form_values())
+        self._search_button = search_button
+
+    def search_person(self, name: str, address: str, country: str) -> int:
+        """
+        Performs a search on the OFAC platform for a given person.
+
+        Args:
+            name    (str): The person's name to search for.
+            address (str): The person's address.
+            country (str): The country to select in the dropdown.
+
+        Returns:
+            int: The number of results found, or -1 if an error occurs.
+        """
+        country_value = self._country_values.get(country)
+        if country_value is None:
+            logger.error(f"Error searching for '{name}': Country '{country}' is not available in the search form.")
+            return -1
+
+        try:
+            data = dict(self._form_values)
+            data.update({
+                "ctl00$MainContent$txtLastName": name,
+                "ctl00$MainContent$txtAddress": address,
+                "ctl00$MainContent$ddlCountry": country_value,
+                "ctl00$MainContent$btnSearch": self._search_button
+            })
+            response = self.session.post(settings.OFAC_URL, data=data, timeout=settings.OFAC_WAIT_TIMEOUT)
+            response.raise_for_status()
+
+            page = lxml.html.fromstring(response.content)
+            self._last_page = response.content
+            self._bind_form_fields(page)
+
+            results_label = page.get_element_by_id("ctl00_MainContent_lblResults", None)
+            match = _RESULT_RE.search(results_label.text_content()) if results_label is not None else None
+            if match is None:
+                logger.error(f"Error searching for '{name}': Result count not found in the response.")
+                return -1
+            count = int(match.group(1))
+            logger.info(f"Parsed result count: {count}")
+            return count
+
+        except requests.RequestException as e:
+            logger.error(f"Error searching for '{name}': Request failed. Details: {e}")
+            self._form_values = None
+            return -1
+        except Exception as e:
+            logger.error(f"Unexpected error during search for '{name}': {e}")
+            self._form_values = None
+            return -1
+
+    def take_screenshot(self, person_id: int):
+        """
+        Saves the HTML of the last results page with a standardized filename,
+        as evidence in place of a browser screenshot.
+
+        Args:
+            person_id (int): The ID of the person being searched.
+        """
+        try:
+            filepath = f"{self._screenshot_prefix}{person_id}.html"
+            with open(filepath, "wb") as page_file:
+                page_file.write(self._last_page)
+            logger.info(f"Results page saved to {filepath}")
+        except Exception as e:
+            logger.error(f"Failed to save results page for person ID {person_id}: {e}")
+
+    def reset_search_form(self):
+        """
+        Prepares the form for the next search. Every search posts all fields, so this
+        only reloads the search page when the previous search left no usable form state.
+        """
+        if self._form_values is not None:
+            return
+        try:
+            self._load_search_form()
+        except Exception as e:
+            logger.error(f"Could not reload the search page: {e}")
+
+    def close(self):
+        """
+        Closes the HTTP session.
+        """
+        if self.session:
+            self.session.close()
+            logger.info("OFAC HTTP client closed.")
@@ -1,17 +1,103 @@
+import functools
 import logging
+import os
 import re
+import subprocess
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from pathlib import Path
 from selenium import webdriver
 from selenium.webdriver.chrome.service import Service as ChromeService
 from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait, Select
+from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException, NoSuchElementException
+from selenium.common.exceptions import TimeoutException, NoSuchElementException, StaleElementReferenceException
 from webdriver_manager.chrome import ChromeDriverManager
+from webdriver_manager.core.os_manager import ChromeType, OperationSystemManager
 from config import settings
 
 logger = logging.getLogger(__name__)
 
+# Result count shown in the OFAC results label
+_RESULT_RE = re.compile(r'(\d+)')
+# Major version in "ChromeDriver 120.0.6099.109 (...)"
+_VERSION_RE = re.compile(r'(\d+)\.\d+\.\d+')
+_chromedriver_lock = threading.Lock()
+
+def _major_version(executable: str) -> str | None:
+    """
+    Returns the major version reported by `executable --version`, or None if unknown.
+    """
+    try:
+        output = subprocess.run(
+            [executable, "--version"], capture_output=True, text=True, timeout=10
+        ).stdout
+    except (OSError, subprocess.SubprocessError):
+        return None
+    match = _VERSION_RE.search(output)
+    return match.group(1) if match else None
+
+def _installed_chrome_major_version() -> str | None:
+    """
+    Returns the major version of the installed Chrome, or None if it cannot be determined.
+    Uses webdriver_manager's OS detection, which knows where Chrome lives on every platform.
+    """
+    try:
+        browser_version = OperationSystemManager().get_browser_version_from_os(ChromeType.GOOGLE)
+    except Exception as e:
+        logger.debug(f"Could not determine the installed Chrome version: {e}")
+        return None
+    if not browser_version:
+        logger.debug("Could not determine the installed Chrome version.")
+        return None
+    return browser_version.split(".")[0]
+
+@functools.cache
+def _cached_chromedriver_path() -> str:
+    """
+    Resolves the ChromeDriver executable, reusing the path cached by a previous run
+    when it still exists and matches the installed Chrome major version.
+    Otherwise falls back to ChromeDriverManager().install() and caches its result.
+    """
+    cache_file = settings.CHROMEDRIVER_PATH_CACHE
+    try:
+        cached_path = cache_file.read_text().strip()
+    except OSError:
+        cached_path = None
+
+    if cached_path and Path(cached_path).is_file():
+        chrome_version = _installed_chrome_major_version()
+        if chrome_version and _major_version(cached_path) == chrome_version:
+            logger.info(f"Using cached ChromeDriver: {cached_path}")
+            return cached_path
+
+    driver_path = ChromeDriverManager().install()
+    try:
+        cache_file.parent.mkdir(parents=True, exist_ok=True)
+        cache_file.write_text(driver_path)
+    except OSError as e:
+        logger.warning(f"Could not cache the ChromeDriver path: {e}")
+    return driver_path
+
+def _resolve_chromedriver_path() -> str:
+    """
+    Thread-safe access to the ChromeDriver path, resolved once per process.
+    """
+    with _chromedriver_lock:
+        return _cached_chromedriver_path()
+
+def _write_png(filepath: str, png: bytes):
+    """
+    Writes an already captured screenshot to disk. Runs on the scraper's I/O pool.
+    """
+    try:
+        with open(filepath, "wb") as png_file:
+            png_file.write(png)
+        logger.info(f"Screenshot saved to {filepath}")
+    except Exception as e:
+        logger.error(f"Failed to write screenshot {filepath}: {e}")
+
 class OfacScraper:
     """
     Handles web scraping of the OFAC sanctions list search platform.
@@ -25,19 +111,64 @@ class OfacScraper:
         Initializes the Selenium WebDriver with Chrome in headless mode.
         Raises an exception if the driver cannot be initialized.
         """
+        self.driver = None
+        self._io_pool = None
         try:
-            service = ChromeService(ChromeDriverManager().install())
+            service = ChromeService(executable_path=_resolve_chromedriver_path())
             options = webdriver.ChromeOptions()
             options.add_argument("--headless") # Run Chrome without UI
             options.add_argument("--no-sandbox") # Disable sandbox (needed in some environments)
             options.add_argument("--disable-dev-shm-usage") # Avoid /dev/shm issues in containers
+            options.add_argument("--blink-settings=imagesEnabled=false") # Skip image decoding
+            options.add_experimental_option("prefs", {
+                "profile.managed_default_content_settings.images": 2, # Do not download images
+                "profile.default_content_setting_values.notifications": 2 # Block notification prompts
+            })
+            options.page_load_strategy = "eager" # Return once the DOM is interactive, not after every subresource
             self.driver = webdriver.Chrome(service=service, options=options)
-            self.wait = WebDriverWait(self.driver, 70)
+            self.wait = WebDriverWait(
+                self.driver,
+                settings.OFAC_WAIT_TIMEOUT,
+                poll_frequency=settings.OFAC_POLL_FREQUENCY,
+                ignored_exceptions=(NoSuchElementException, StaleElementReferenceException)
+            )
+            # Screenshot files are written in the background so the next search can start
+            self._io_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="screenshot-writer")
+            # Screenshots are named after the date the scraper started, resolved once per run
+            self._screenshot_prefix = os.path.join(
+                str(settings.SCREENSHOTS_DIR), datetime.now().strftime('%Y%m%d') + "_"
+            )
             logger.info("WebDriver initialized successfully.")
+            self._load_search_form()
         except Exception as e:
             logger.error(f"Failed to initialize WebDriver: {e}")
+            # Do not leave a headless Chrome running behind a scraper that failed to start
+            self.close()
             raise
 
+    def _load_search_form(self):
+        """
+        Navigates to the OFAC search page and binds the search form elements.
+        Only needed on startup or to recover from an unexpected page state.
+        """
+        self.driver.get(settings.OFAC_URL)
+        self._bind_form_elements()
+        # Map visible country names to option values in one round-trip, instead of
+        # letting Select scan every option over the WebDriver bridge on each search
+        self._country_values = dict(self.driver.execute_script(
+            "return Array.from(document.getElementById('ctl00_MainContent_ddlCountry').options,"
+            " option => [option.text, option.value]);"
+        ))
+
+    def _bind_form_elements(self):
+        """
+        Caches references to the search form elements.
+        Must be called again after every postback, since ASP.NET replaces the DOM nodes.
+        """
+        self._name_el = self.wait.until(EC.presence_of_element_located((By.ID, "ctl00_MainContent_txtLastName")))
+        self._addr_el = self.driver.find_element(By.ID, "ctl00_MainContent_txtAddress")
+        self._submit_btn = self.driver.find_element(By.ID, "ctl00_MainContent_btnSearch")
+
     def search_person(self, name: str, address: str, country: str) -> int:
         """
         Performs a search on the OFAC platform for a given person.
@@ -51,23 +182,33 @@ class OfacScraper:
             int: The number of results found, or -1 if an error occurs.
         """
         try:
-            self.driver.get(settings.OFAC_URL)
-
-            # Fill in the search form fields
-            self.wait.until(EC.presence_of_element_located((By.ID, "ctl00_MainContent_txtLastName"))).send_keys(name)
-            self.driver.find_element(By.ID, "ctl00_MainContent_txtAddress").send_keys(address)
-            country_dropdown = Select(self.driver.find_element(By.ID, "ctl00_MainContent_ddlCountry"))
-            country_dropdown.select_by_visible_text(country)
+            # Fill in the search form fields (the page is already loaded, no navigation needed)
+            self._name_el.clear()
+            self._name_el.send_keys(name)
+            self._addr_el.clear()
+            self._addr_el.send_keys(address)
+            self.driver.execute_script(
+                "document.getElementById('ctl00_MainContent_ddlCountry').value = arguments[0];",
+                self._country_values[country]
+            )
 
             # Submit the search form
-            self.driver.find_element(By.ID, "ctl00_MainContent_btnSearch").click()
+            self._submit_btn.click()
+            # The submit is a postback: make sure the old DOM is gone, so the label read
+            # below cannot be the previous person's result
+            self.wait.until(EC.staleness_of(self._submit_btn))
 
-            # Wait for and parse the results
-            results_element = self.wait.until(
-                EC.presence_of_element_located((By.ID, "ctl00_MainContent_lblResults"))
+            # Wait until the results label shows a count; the wait returns the regex match
+            match = self.wait.until(
+                lambda driver: _RESULT_RE.search(driver.find_element(By.ID, "ctl00_MainContent_lblResults").text)
             )
-            return self._parse_results(results_element.text)
+            count = int(match.group(1))
+            logger.info(f"Parsed result count: {count}")
+            return count
 
+        except KeyError:
+            logger.error(f"Error searching for '{name}': Country '{country}' is not available in the search form.")
+            return -1
         except (TimeoutException, NoSuchElementException) as e:
             logger.error(f"Error searching for '{name}': Element not found or timed out. Details: {e}")
             return -1
@@ -75,55 +216,47 @@ class OfacScraper:
             logger.error(f"Unexpected error during search for '{name}': {e}")
             return -1
 
-    def _parse_results(self, result_text: str) -> int:
-        """
-        Extracts the number of matches from the result text.
-
-        Args:
-            result_text (str): The text containing the result count.
-
-        Returns:
-            int: The parsed number of results, or 0 if parsing fails.
-        """
-        match = re.search(r'(\d+)', result_text)
-        if match:
-            count = int(match.group(1))
-            logger.info(f"Parsed result count: {count}")
-            return count
-        logger.warning(f"Could not parse result count from text: '{result_text}'")
-        return 0
-
     def take_screenshot(self, person_id: int):
         """
         Takes a screenshot of the current page and saves it with a standardized filename.
+        The PNG is captured synchronously; writing it to disk happens in the background.
 
         Args:
             person_id (int): The ID of the person being searched.
         """
         try:
             self.driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-            today = datetime.now().strftime('%Y%m%d')
-            filename = f"{today}_{person_id}.png"
-            filepath = settings.SCREENSHOTS_DIR / filename
-            self.driver.save_screenshot(str(filepath))
-            logger.info(f"Screenshot saved to {filepath}")
+            filepath = f"{self._screenshot_prefix}{person_id}.png"
+            png = self.driver.get_screenshot_as_png()
+            self._io_pool.submit(_write_png, filepath, png)
         except Exception as e:
             logger.error(f"Failed to take screenshot for person ID {person_id}: {e}")
 
     def reset_search_form(self):
         """
         Resets the search form to clear all fields for the next search.
+        Falls back to reloading the search page if the reset postback fails.
         """
         try:
-            self.driver.find_element(By.ID, "ctl00_MainContent_btnReset").click()
-            logger.info("Search form has been reset.")
+            reset_button = self.driver.find_element(By.ID, "ctl00_MainContent_btnReset")
+            reset_button.click()
+            # The reset is a postback: wait for the old DOM to go away, then re-bind the form
+            self.wait.until(EC.staleness_of(reset_button))
+            self._bind_form_elements()
+            logger.debug("Search form has been reset.")
         except Exception as e:
-            logger.error(f"Could not reset the search form: {e}")
+            logger.error(f"Could not reset the search form, reloading the search page: {e}")
+            try:
+                self._load_search_form()
+            except Exception as reload_error:
+                logger.error(f"Could not reload the search page: {reload_error}")
 
     def close(self):
         """
-        Closes the Selenium WebDriver.
+        Waits for pending screenshot writes, then closes the Selenium WebDriver.
         """
+        if self._io_pool:
+            self._io_pool.shutdown(wait=True)
         if self.driver:
             self.driver.quit()
             logger.info("WebDriver closed.")
\ No newline at end of file